@@ -22,86 +22,478 @@ Usage (run from the repository root or from a mounted volume):
 """
 
 import argparse
-import json
+import asyncio
+import enum
+import functools
+import hashlib
+import io
 import os
+import random
 import re
 import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Dict, List, Set
-import requests
+from typing import (AsyncIterator, Awaitable, BinaryIO, Callable, DefaultDict, Dict, List,
+                    NamedTuple, Optional, Set, Tuple, TypeVar)
+from urllib.parse import urlsplit
+
+import aiohttp
+import orjson
+from PIL import Image
+
+# Discovery endpoints are expected to answer quickly; anything slower is treated as down.
+DISCOVERY_TIMEOUT = aiohttp.ClientTimeout(total=5)
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=10)
+DOWNLOAD_CHUNK_SIZE = 65536
+# Default upper bounds on models resolved at once, and on open requests per host.
+MAX_CONCURRENCY = 16
+PER_HOST_CONCURRENCY = 8
+# Shared connection pool; idle keep‑alive sockets are reused across all requests of a run.
+CONNECTION_LIMIT = 32
+KEEPALIVE_TIMEOUT = 30
+# Downloaded bodies are kept under `<icon_dir>/.http-cache/` and reused for a day.
+HTTP_CACHE_DIRNAME = '.http-cache'
+HTTP_CACHE_TTL = 86400
+# Content‑addressed icon store; per‑model files are links into `<icon_dir>/.by-hash/`.
+BY_HASH_DIRNAME = '.by-hash'
+# Icons are re‑encoded as PNG no larger than this; the UI only renders them small.
+ICON_SIZE = (128, 128)
+# Models that Hugging‑Face has no card image for; they are not probed again for a week.
+MISSES_FILENAME = '.misses.json'
+MISS_TTL = 7 * 86400
+DEFAULT_REL_URL = '/icons/default.png'
+# Discovered model lists are reused for an hour unless `--refresh` is given.
+MODEL_LISTS_FILENAME = '.model_lists.json'
+DISCOVERY_TTL = 3600
+OPENAI_MODELS_URL = 'https://api.openai.com/v1/models'
+# Hugging‑Face model listing, used to learn which repos exist before probing them.
+HF_MODELS_API = 'https://huggingface.co/api/models'
+HF_LIST_LIMIT = 1000
+# Transient statuses (rate limiting, gateway hiccups) that are retried with backoff.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Statuses that mean the resource does not exist, as opposed to a failed request.
+NOT_FOUND_STATUSES = frozenset({404, 410})
+MAX_BACKOFF = 30.0
+
+
+class HttpPolicy(NamedTuple):
+    """
+    Retry and politeness settings applied to icon probes and downloads.
+    `host_slots` and `throttle` hold the per‑run limiter state; they are filled in
+    by `_bind_limits` and left as None when no limits are enforced.
+    """
+    max_retries: int = 4
+    base_backoff: float = 0.5
+    concurrency: int = MAX_CONCURRENCY
+    per_host_concurrency: int = PER_HOST_CONCURRENCY
+    requests_per_second: float = 0.0
+    host_slots: Optional[DefaultDict[str, asyncio.Semaphore]] = None
+    throttle: Optional[Callable[[], Awaitable[None]]] = None
+
+
+DEFAULT_POLICY = HttpPolicy()
+
+
+class Outcome(enum.Enum):
+    """
+    Result of an icon probe or download. MISSING means the server says there is no
+    usable image; FAILED means the request itself failed (network error, retries
+    used up) and is worth repeating on a later run.
+    """
+    FOUND = 'found'
+    MISSING = 'missing'
+    FAILED = 'failed'
+
+T = TypeVar('T')
+
+# Downloads in progress, keyed by cache file, so concurrent requests for the
+# same URL (e.g. one provider badge for many models) share a single transfer.
+_IN_FLIGHT: Dict[Path, 'asyncio.Task[Outcome]'] = {}
+
+# Anything other than alphanumerics, dash and underscore.
+_SLUG_RE = re.compile(r'[^a-zA-Z0-9_-]+')
+
+# Small provider badges, keyed by a lower‑case token that appears in the model ID.
+# This is optional; you can extend the mapping with your own URLs, also at runtime.
+PROVIDER_ASSETS = {
+    'gpt-': 'https://raw.githubusercontent.com/openai/openai-python/master/assets/openai.png',
+    'claude-': 'https://cdn.clarifai.com/clarifai-logo.png',
+    # Add more providers as you wish...
+}
 
 # -------------------------------------------------------------------------
 # Helper utilities
 # -------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=8)
+def _provider_re(tokens: Tuple[str, ...]) -> Optional[re.Pattern[str]]:
+    """
+    Return all provider `tokens` as one alternation, so each model ID is scanned only
+    once. Returns None for no tokens: an empty alternation would match every ID.
+    Cached per token tuple, so changes to `PROVIDER_ASSETS` are picked up.
+    """
+    if not tokens:
+        return None
+    return re.compile('|'.join(re.escape(token) for token in tokens))
+
+
 def slugify(text: str) -> str:
     """Return a filesystem‑safe, lower‑case identifier."""
     # Keep alphanumerics, dash and underscore; replace everything else with `-`
-    clean = re.sub(r'[^a-zA-Z0-9_-]+', '-', text).strip('-').lower()
+    clean = _SLUG_RE.sub('-', text).strip('-').lower()
     return clean or 'unknown'
 
 
-def safe_write_json(path: Path, data: Dict) -> None:
-    """Write JSON with sorted keys and a trailing newline."""
+def safe_write_json(path: Path, data: Dict) -> bool:
+    """
+    Write JSON with sorted keys and a trailing newline.
+    The file is replaced atomically, and left untouched when its content would not
+    change. Returns True if the file was written, False if it was already up to date.
+    """
+    payload = orjson.dumps(
+        data, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+    )
+    try:
+        if path.read_bytes() == payload:
+            return False
+    except FileNotFoundError:
+        pass
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open('w', encoding='utf-8') as fp:
-        json.dump(data, fp, indent=2, sort_keys=True)
-        fp.write('\n')
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+    return True
 
 
-def download_file(url: str, dest: Path) -> bool:
-    """Download a URL to `dest`. Returns True on success."""
+def _open_for_write(dest: Path) -> BinaryIO:
+    """Open `dest` for binary writing, creating parent directories as needed."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    return dest.open('wb')
+
+
+def normalise_icon(payload: bytes) -> Optional[bytes]:
+    """
+    Return `payload` re‑encoded as an optimised PNG that fits within `ICON_SIZE`.
+    Returns None if `payload` is not a readable image (e.g. an HTML error page).
+    """
     try:
-        resp = requests.get(url, timeout=10, stream=True)
-        resp.raise_for_status()
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        with dest.open('wb') as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                f.write(chunk)
-        return True
+        with Image.open(io.BytesIO(payload)) as im:
+            im.verify()
+        # `verify` leaves the image unusable, so decode it again for the resize.
+        with Image.open(io.BytesIO(payload)) as im:
+            if im.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+                im = im.convert('RGBA')
+            im.thumbnail(ICON_SIZE, Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            im.save(out, 'PNG', optimize=True, compress_level=9)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return None
+    return out.getvalue()
+
+
+def _normalise_in_place(path: Path) -> bool:
+    """Rewrite `path` through `normalise_icon`. Returns False if it is not an image."""
+    payload = normalise_icon(path.read_bytes())
+    if payload is None:
+        return False
+    path.write_bytes(payload)
+    return True
+
+
+def _store_intact(store: Path, digest: str) -> bool:
+    """Return True if the store file `store` exists and its content still hashes to `digest`."""
+    try:
+        return hashlib.sha256(store.read_bytes()).hexdigest() == digest
+    except FileNotFoundError:
+        return False
+
+
+def _link_by_hash(src: Path, dest: Path) -> bool:
+    """
+    Place the (already normalised) icon in `src` at `dest` via the content‑addressed
+    store. Returns False, leaving `dest` alone, if `src` has disappeared. The icon is
+    stored once as `.by-hash/<sha256>.png` next to `dest`, and `dest` becomes a hard
+    link to that file (or a relative symlink where hard links are not supported), so
+    identical icons such as a shared provider badge exist only once. Store files are
+    read‑only, as writing to any of the links would change every model sharing the
+    image; one whose content no longer matches its name is written afresh. The link
+    is created under a unique temporary name and renamed onto `dest`, so models whose
+    IDs slugify to the same file can be linked concurrently. Raises OSError on
+    filesystem errors.
+    """
+    try:
+        payload = src.read_bytes()
+    except FileNotFoundError:
+        return False
+    digest = hashlib.sha256(payload).hexdigest()
+    store = dest.parent / BY_HASH_DIRNAME / f'{digest}.png'
+    if not _store_intact(store, digest):
+        store.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=store.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(payload)
+        # mkstemp creates owner‑only files; icons must stay readable by the web server.
+        os.chmod(tmp_name, 0o444)
+        os.replace(tmp_name, store)
+    tmp_link = dest.with_name(f'.{dest.name}.{uuid.uuid4().hex}.tmp')
+    try:
+        os.link(store, tmp_link)
+    except OSError:
+        tmp_link.symlink_to(os.path.relpath(store, dest.parent))
+    try:
+        os.replace(tmp_link, dest)
+    finally:
+        # rename() is a no‑op when both names already link to the same file, which
+        # leaves the temporary name behind; it never refers to `dest` itself.
+        tmp_link.unlink(missing_ok=True)
+    return True
+
+
+def prune_by_hash(icon_dir: Path) -> None:
+    """Delete files of the content‑addressed store below `icon_dir` that no icon links to."""
+    store_dir = icon_dir / BY_HASH_DIRNAME
+    if not store_dir.is_dir():
+        return
+    symlinked = {Path(os.path.realpath(entry)) for entry in icon_dir.iterdir()
+                 if entry.is_symlink()}
+    for entry in store_dir.glob('*.png'):
+        # A hard link from a per‑model icon raises the link count above one.
+        if entry.stat().st_nlink == 1 and Path(os.path.realpath(entry)) not in symlinked:
+            entry.unlink(missing_ok=True)
+
+
+def _cache_path(url: str, dest_dir: Path) -> Path:
+    """Return the on‑disk cache location for `url` below `dest_dir`."""
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return dest_dir / HTTP_CACHE_DIRNAME / f'{key}.png'
+
+
+def _is_fresh(path: Path, ttl: float = HTTP_CACHE_TTL) -> bool:
+    """Return True if `path` exists and was written less than `ttl` seconds ago."""
+    try:
+        return time.time() - path.stat().st_mtime < ttl
+    except FileNotFoundError:
+        return False
+
+
+def prune_http_cache(icon_dir: Path, ttl: float = HTTP_CACHE_TTL) -> None:
+    """Delete entries of the download cache below `icon_dir` older than `ttl` seconds."""
+    cache_dir = icon_dir / HTTP_CACHE_DIRNAME
+    if not cache_dir.is_dir():
+        return
+    for entry in cache_dir.iterdir():
+        if entry.is_file() and not _is_fresh(entry, ttl):
+            entry.unlink(missing_ok=True)
+
+
+def _retry_delay(resp: aiohttp.ClientResponse, attempt: int, base_backoff: float) -> float:
+    """
+    Return how long to wait before retrying `resp`. Honours a `Retry-After` header
+    (seconds or HTTP date) and otherwise backs off exponentially with jitter.
+    The delay never exceeds `MAX_BACKOFF`.
+    """
+    retry_after = resp.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return min(MAX_BACKOFF, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(retry_after).timestamp()
+            return min(MAX_BACKOFF, max(0.0, when - time.time()))
+        except (TypeError, ValueError):
+            pass
+    return min(MAX_BACKOFF, base_backoff * 2 ** attempt + random.random() * 0.3)
+
+
+def _make_throttle(rate: float) -> Callable[[], Awaitable[None]]:
+    """Return a coroutine function that spaces successive calls `1 / rate` seconds apart."""
+    interval = 1.0 / rate
+    next_slot = 0.0
+
+    async def throttle() -> None:
+        nonlocal next_slot
+        now = asyncio.get_running_loop().time()
+        slot = max(now, next_slot)
+        next_slot = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    return throttle
+
+
+def _bind_limits(policy: HttpPolicy) -> HttpPolicy:
+    """Return `policy` with fresh per‑host semaphores and request‑rate throttle for one run."""
+    host_slots = defaultdict(lambda: asyncio.Semaphore(policy.per_host_concurrency))
+    throttle = None
+    if policy.requests_per_second > 0:
+        throttle = _make_throttle(policy.requests_per_second)
+    return policy._replace(host_slots=host_slots, throttle=throttle)
+
+
+@asynccontextmanager
+async def _request(session: aiohttp.ClientSession, method: str, url: str,
+                   policy: HttpPolicy = DEFAULT_POLICY,
+                   **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+    """
+    Issue an HTTP request, retrying up to `policy.max_retries` times while the
+    server answers with one of `RETRY_STATUSES`. Yields the final response.
+    When the policy carries limits, the request holds one of its host's slots
+    until the response is released, and every attempt waits for the throttle.
+    """
+    slot = None
+    if policy.host_slots is not None:
+        # Not `if policy.host_slots`: the slots are created on first use, so an
+        # unused table is empty and would be falsy.
+        slot = policy.host_slots[urlsplit(url).hostname or '']
+    if slot is not None:
+        await slot.acquire()
+    try:
+        attempt = 0
+        while True:
+            if policy.throttle is not None:
+                await policy.throttle()
+            resp = await session.request(method, url, **kwargs)
+            if resp.status not in RETRY_STATUSES or attempt >= policy.max_retries:
+                break
+            delay = _retry_delay(resp, attempt, policy.base_backoff)
+            resp.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+        try:
+            yield resp
+        finally:
+            resp.release()
+    finally:
+        if slot is not None:
+            slot.release()
+
+
+async def _download_to_cache(session: aiohttp.ClientSession, url: str, cached: Path,
+                             policy: HttpPolicy = DEFAULT_POLICY) -> Outcome:
+    """
+    Fetch `url` into the cache file `cached`.
+    The body is streamed into a `.part` file, passed once through `normalise_icon`
+    and only then moved onto `cached`; bodies that are not images are discarded
+    and, like a 404 or 410, reported as MISSING.
+    Local file I/O blocks, so each write runs on a worker thread while the event
+    loop keeps reading this and other sockets.
+    """
+    part = cached.with_name(f'{cached.name}.part')
+    try:
+        async with _request(session, 'GET', url, policy, timeout=DOWNLOAD_TIMEOUT) as resp:
+            if resp.status in NOT_FOUND_STATUSES:
+                return Outcome.MISSING
+            resp.raise_for_status()
+            fp = await asyncio.to_thread(_open_for_write, part)
+            try:
+                async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    await asyncio.to_thread(fp.write, chunk)
+            finally:
+                await asyncio.to_thread(fp.close)
+        if not await asyncio.to_thread(_normalise_in_place, part):
+            print(f'⚠️  {url} did not return a usable image', file=sys.stderr)
+            part.unlink(missing_ok=True)
+            return Outcome.MISSING
+        os.replace(part, cached)
+        return Outcome.FOUND
     except Exception as exc:  # pragma: no cover – network errors are environment‑specific
         print(f'⚠️  Failed to download {url}: {exc}', file=sys.stderr)
-        return False
+        part.unlink(missing_ok=True)
+        return Outcome.FAILED
+
+
+async def _fetch_cached(session: aiohttp.ClientSession, url: str, cached: Path,
+                        policy: HttpPolicy = DEFAULT_POLICY) -> Outcome:
+    """Populate `cached` from `url`, joining any transfer of the same URL already running."""
+    task = _IN_FLIGHT.get(cached)
+    if task is None:
+        task = asyncio.ensure_future(_download_to_cache(session, url, cached, policy))
+        _IN_FLIGHT[cached] = task
+        task.add_done_callback(lambda _: _IN_FLIGHT.pop(cached, None))
+    return await task
+
+
+async def download_file_async(session: aiohttp.ClientSession, url: str, dest: Path,
+                              policy: HttpPolicy = DEFAULT_POLICY) -> bool:
+    """
+    Download a URL to `dest`. Returns True on success.
+    Bodies are cached per URL for `HTTP_CACHE_TTL` seconds, so a URL shared by
+    several models (or fetched on a previous run) only goes over the network once.
+    Transient failures are retried according to `policy`. Responses that are not
+    images count as failures, so the caller can move on to the next fallback.
+    Cached bodies are already normalised, so each image is re‑encoded only once no
+    matter how many models share it.
+    """
+    return await _download(session, url, dest, policy) is Outcome.FOUND
+
+
+async def _download(session: aiohttp.ClientSession, url: str, dest: Path,
+                    policy: HttpPolicy = DEFAULT_POLICY) -> Outcome:
+    """Like `download_file_async`, but tell a missing image apart from a failed request."""
+    cached = _cache_path(url, dest.parent)
+    if not _is_fresh(cached):
+        outcome = await _fetch_cached(session, url, cached, policy)
+        if outcome is not Outcome.FOUND:
+            return outcome
+    try:
+        linked = await asyncio.to_thread(_link_by_hash, cached, dest)
+    except OSError as exc:
+        print(f'⚠️  Failed to store {url} as {dest.name}: {exc}', file=sys.stderr)
+        return Outcome.FAILED
+    return Outcome.FOUND if linked else Outcome.FAILED
 
 # -------------------------------------------------------------------------
 # Model discovery functions
 # -------------------------------------------------------------------------
 
-def fetch_ollama_models(base_url: str = 'http://localhost:11434') -> Set[str]:
+async def _fetch_json(session: aiohttp.ClientSession, url: str,
+                      headers: Optional[Dict[str, str]] = None,
+                      timeout: aiohttp.ClientTimeout = DISCOVERY_TIMEOUT) -> Dict:
+    """GET `url` and return the decoded JSON body. Raises on HTTP or decode errors."""
+    async with session.get(url, headers=headers, timeout=timeout) as resp:
+        resp.raise_for_status()
+        # Decode the raw body ourselves: faster than `resp.json()`, and indifferent to
+        # OpenAI‑compatible servers that omit the JSON content type.
+        return orjson.loads(await resp.read())
+
+
+async def _fetch_ollama_models(session: aiohttp.ClientSession,
+                               base_url: str = 'http://localhost:11434') -> Set[str]:
     """Return a set of model IDs from a local Ollama daemon."""
     try:
-        resp = requests.get(f'{base_url}/api/tags', timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
+        data = await _fetch_json(session, f'{base_url}/api/tags')
         return {model['name'] for model in data.get('models', [])}
     except Exception as exc:  # pragma: no cover
         print(f'⚠️  Ollama query failed: {exc}', file=sys.stderr)
         return set()
 
 
-def fetch_openai_models(api_key: str) -> Set[str]:
+async def _fetch_openai_models(session: aiohttp.ClientSession, api_key: str) -> Set[str]:
     """Return a set of model IDs from the official OpenAI endpoint."""
     headers = {'Authorization': f'Bearer {api_key}'}
     try:
-        resp = requests.get('https://api.openai.com/v1/models', headers=headers, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
+        data = await _fetch_json(session, OPENAI_MODELS_URL, headers)
         return {m['id'] for m in data.get('data', [])}
     except Exception as exc:  # pragma: no cover
         print(f'⚠️  OpenAI query failed: {exc}', file=sys.stderr)
         return set()
 
 
-def fetch_ollama_turbo_models(url: str, api_key: str = '') -> Set[str]:
+async def _fetch_ollama_turbo_models(session: aiohttp.ClientSession, url: str,
+                                     api_key: str = '') -> Set[str]:
     """
     Query an Ollama‑Turbo compatible endpoint. The endpoint follows the OpenAI
     `/v1/models` contract, so we can reuse the same parsing logic.
     """
     headers = {'Authorization': f'Bearer {api_key}'} if api_key else {}
     try:
-        resp = requests.get(url, headers=headers, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
+        data = await _fetch_json(session, url, headers)
         return {m['id'] for m in data.get('data', [])}
     except Exception as exc:  # pragma: no cover
         print(f'⚠️  Ollama‑Turbo query failed: {exc}', file=sys.stderr)
@@ -122,35 +514,157 @@ def resolve_icon_path(model_id: str, icon_dir: Path) -> Path:
     return icon_dir / filename
 
 
-def download_hf_card_image(model_id: str, dest: Path) -> bool:
-    """
-    Try to pull the model card image from Hugging‑Face. The convention is:
-    https://huggingface.co/<repo>/raw/main/card.png
-    Many community models follow that layout.
-    """
+def hf_repo(model_id: str) -> Optional[str]:
+    """Return the `<author>/<name>` Hugging‑Face repo for `model_id`, or None."""
     # Heuristic: split on '/' and take the first two components as repo path.
     parts = model_id.split('/')
     if len(parts) < 2:
+        return None
+    return '/'.join(parts[:2])
+
+
+def hf_card_url(model_id: str) -> Optional[str]:
+    """
+    Return the Hugging‑Face model card image URL for `model_id`. The convention is:
+    https://huggingface.co/<repo>/raw/main/card.png
+    Many community models follow that layout. Returns None for IDs without a repo part.
+    """
+    repo = hf_repo(model_id)
+    if repo is None:
+        return None
+    return f'https://huggingface.co/{repo}/raw/main/card.png'
+
+
+async def list_hf_repos(session: aiohttp.ClientSession, author: str,
+                        policy: HttpPolicy = DEFAULT_POLICY) -> Optional[Set[str]]:
+    """
+    Return the lower‑cased IDs of all Hugging‑Face repos published by `author`.
+    Returns None when the listing is unavailable, malformed or truncated at
+    `HF_LIST_LIMIT`, in which case the caller cannot rule any of the author's repos out.
+    """
+    params = {'author': author, 'limit': str(HF_LIST_LIMIT)}
+    try:
+        async with _request(session, 'GET', HF_MODELS_API, policy,
+                            params=params, timeout=DOWNLOAD_TIMEOUT) as resp:
+            resp.raise_for_status()
+            data = orjson.loads(await resp.read())
+        if not isinstance(data, list):
+            raise TypeError(f'expected a list of models, got {type(data).__name__}')
+        if len(data) >= HF_LIST_LIMIT:
+            return None
+        return {entry['id'].lower() for entry in data}
+    except Exception as exc:  # pragma: no cover – network errors are environment‑specific
+        print(f'⚠️  Failed to list Hugging‑Face repos of {author}: {exc}', file=sys.stderr)
+        return None
+
+
+async def filter_hf_candidates(session: aiohttp.ClientSession, models: List[str],
+                               policy: HttpPolicy = DEFAULT_POLICY) -> List[str]:
+    """
+    Return the subset of `models` whose Hugging‑Face repo may exist.
+    Authors with several models are listed once with a single API call, instead of
+    probing every model's card image individually. Authors with a single model are
+    left to the probe, which is cheaper than a listing.
+    """
+    repos = {model: hf_repo(model) for model in models}
+    per_author = Counter(repo.split('/')[0] for repo in repos.values() if repo)
+    authors = sorted(author for author, count in per_author.items() if count > 1)
+    listings = await asyncio.gather(*(list_hf_repos(session, author, policy) for author in authors))
+    known = dict(zip(authors, listings))
+
+    candidates = []
+    for model, repo in repos.items():
+        if repo is None:
+            continue
+        listed = known.get(repo.split('/')[0])
+        if listed is None or repo.lower() in listed:
+            candidates.append(model)
+    return candidates
+
+
+async def probe_hf(session: aiohttp.ClientSession, model_id: str, icon_dir: Path,
+                   policy: HttpPolicy = DEFAULT_POLICY) -> Outcome:
+    """
+    Check whether Hugging‑Face serves a card image (`hf_card_url`) for `model_id`.
+    Uses a HEAD request so that missing images cost no response body; URLs that
+    are already in the download cache are FOUND without touching the network.
+    IDs without a repo part and 404/410 answers are MISSING; any other status or
+    a network error is FAILED.
+    """
+    url = hf_card_url(model_id)
+    if url is None:
+        return Outcome.MISSING
+    if _is_fresh(_cache_path(url, icon_dir)):
+        return Outcome.FOUND
+    try:
+        async with _request(session, 'HEAD', url, policy,
+                            allow_redirects=True, timeout=DISCOVERY_TIMEOUT) as resp:
+            if resp.status == 200:
+                return Outcome.FOUND
+            if resp.status in NOT_FOUND_STATUSES:
+                return Outcome.MISSING
+            return Outcome.FAILED
+    except Exception as exc:  # pragma: no cover – network errors are environment‑specific
+        print(f'⚠️  Failed to probe {url}: {exc}', file=sys.stderr)
+        return Outcome.FAILED
+
+
+async def download_hf_card_image_async(session: aiohttp.ClientSession, model_id: str,
+                                       dest: Path, policy: HttpPolicy = DEFAULT_POLICY) -> bool:
+    """
+    Download the model card image from Hugging‑Face (see `hf_card_url`) to `dest`.
+    Returns False for IDs without a repo part or if the image cannot be fetched.
+    """
+    url = hf_card_url(model_id)
+    if url is None:
         return False
-    repo = '/'.join(parts[:2])
-    url = f'https://huggingface.co/{repo}/raw/main/card.png'
-    return download_file(url, dest)
+    return await download_file_async(session, url, dest, policy)
 
 
-def fallback_provider_badge(model_id: str, dest: Path) -> bool:
+async def fallback_provider_badge_async(session: aiohttp.ClientSession, model_id: str,
+                                        dest: Path,
+                                        policy: HttpPolicy = DEFAULT_POLICY) -> bool:
+    """
+    If the model name contains a known provider token (see `PROVIDER_ASSETS`),
+    use a small badge.
+    """
+    assets = dict(PROVIDER_ASSETS)
+    pattern = _provider_re(tuple(assets))
+    if pattern is None:
+        return False
+    match = pattern.search(model_id.lower())
+    if match is None:
+        return False
+    return await download_file_async(session, assets[match.group(0)], dest, policy)
+
+
+def load_state(path: Path) -> Dict:
     """
-    If the model name contains a known provider token, use a small badge.
-    This is optional; you can extend the mapping with your own URLs.
+    Return the JSON object stored in the state file `path`, or {} if there is none
+    or it holds anything other than an object (e.g. an old or hand‑edited file).
     """
-    provider_assets = {
-        'gpt-': 'https://raw.githubusercontent.com/openai/openai-python/master/assets/openai.png',
-        'claude-': 'https://cdn.clarifai.com/clarifai-logo.png',
-        # Add more providers as you wish...
-    }
-    for token, badge_url in provider_assets.items():
-        if token in model_id.lower():
-            return download_file(badge_url, dest)
-    return False
+    try:
+        state = orjson.loads(path.read_bytes())
+    except FileNotFoundError:
+        return {}
+    except orjson.JSONDecodeError as exc:
+        print(f'⚠️  Ignoring unreadable {path.name}: {exc}', file=sys.stderr)
+        return {}
+    if not isinstance(state, dict):
+        print(f'⚠️  Ignoring {path.name}: expected a JSON object', file=sys.stderr)
+        return {}
+    return state
+
+
+def load_misses(icon_dir: Path) -> Dict[str, float]:
+    """Return the recorded known misses as `{model_id: recorded_at}`."""
+    return {model: recorded for model, recorded in load_state(icon_dir / MISSES_FILENAME).items()
+            if isinstance(recorded, (int, float))}
+
+
+def _credential_tag(credential: str) -> str:
+    """Return a short digest of `credential` that is safe to store in the icon directory."""
+    return hashlib.sha256(credential.encode('utf-8')).hexdigest()[:12]
 
 
 def ensure_default_icon(icon_dir: Path) -> None:
@@ -161,6 +675,7 @@ def ensure_default_icon(icon_dir: Path) -> None:
     default_path = icon_dir / 'default.png'
     if default_path.is_file():
         return
+    icon_dir.mkdir(parents=True, exist_ok=True)
     # Use a tiny built‑in 1×1 transparent PNG (base64 decoded) to avoid external fetch.
     transparent_png = (
         b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01'
@@ -174,29 +689,242 @@ def ensure_default_icon(icon_dir: Path) -> None:
 # -------------------------------------------------------------------------
 
 
-def build_icon_map(models: Set[str], icon_dir: Path) -> Dict[str, str]:
+async def _resolve_one(session: aiohttp.ClientSession, model: str, icon_dir: Path,
+                       card_url: Optional[str], semaphore: asyncio.Semaphore,
+                       policy: HttpPolicy = DEFAULT_POLICY
+                       ) -> Tuple[str, str, Optional[Outcome]]:
     """
-    For every model ID generate a JSON entry pointing to the static asset.
-    The UI expects a relative URL like `/icons/<filename>`.
+    Return `(model, rel_url, card)`, downloading the model's icon first if it is
+    missing. `card_url` is the HF card image found by `probe_hf`, if any, and `card`
+    the outcome of downloading it (None if it was not tried).
     """
-    mapping = {}
-    for model in models:
+    card = None
+    async with semaphore:
         target = resolve_icon_path(model, icon_dir)
         if not target.is_file():
             # Try to fetch an HF card image first
-            if download_hf_card_image(model, target):
+            if card_url:
+                card = await _download(session, card_url, target, policy)
+            if card is Outcome.FOUND:
                 pass
-            elif fallback_provider_badge(model, target):
+            elif await fallback_provider_badge_async(session, model, target, policy):
                 pass
             else:
                 # No specific image – point at the generic fallback
                 target = icon_dir / 'default.png'
-        # The URL that the front‑end will request (relative to /public)
-        rel_url = f'/icons/{target.name}'
-        mapping[model] = rel_url
+    # The URL that the front‑end will request (relative to /public)
+    return model, f'/icons/{target.name}', card
+
+
+async def build_icon_map_async(session: aiohttp.ClientSession, models: Set[str],
+                               icon_dir: Path,
+                               policy: HttpPolicy = DEFAULT_POLICY) -> Dict[str, str]:
+    """
+    For every model ID generate a JSON entry pointing to the static asset.
+    The UI expects a relative URL like `/icons/<filename>`. Models are resolved
+    concurrently, at most `policy.concurrency` at a time, with the per‑host and
+    request‑rate limits of `policy` applied to every icon request. Models that fell
+    back to `default.png` because HF definitely has no card image for them are
+    recorded in `MISSES_FILENAME` and not probed on HF again for `MISS_TTL` seconds,
+    so warm runs only probe new models; provider badges are still tried for them.
+    Failed lookups are not recorded. Expired download cache entries and store files
+    that no icon links to any more are removed at the end.
+    """
+    policy = _bind_limits(policy)
+    misses = load_misses(icon_dir)
+    now = time.time()
+    known_misses = {model for model, recorded in misses.items() if now - recorded < MISS_TTL}
+
+    # Drop models whose repo is not on HF, then sweep the rest with cheap HEAD
+    # probes so only real card images are downloaded.
+    pending = [model for model in models if model not in known_misses
+               and not resolve_icon_path(model, icon_dir).is_file()]
+    candidates = await filter_hf_candidates(session, pending, policy)
+    probes = await asyncio.gather(
+        *(probe_hf(session, model, icon_dir, policy) for model in candidates)
+    )
+    card_urls = {model: hf_card_url(model) for model, outcome in zip(candidates, probes)
+                 if outcome is Outcome.FOUND}
+    # Only a definitive negative makes a miss: no repo part, a repo absent from a
+    # complete author listing, or a card image the server says is not there.
+    hf_missing = set(pending) - set(candidates)
+    hf_missing.update(model for model, outcome in zip(candidates, probes)
+                      if outcome is Outcome.MISSING)
+
+    semaphore = asyncio.Semaphore(policy.concurrency)
+    results = await asyncio.gather(
+        *(_resolve_one(session, model, icon_dir, card_urls.get(model), semaphore, policy)
+          for model in models)
+    )
+    mapping = {model: rel_url for model, rel_url, _ in results}
+    hf_missing.update(model for model, _, card in results if card is Outcome.MISSING)
+
+    # Keep unexpired entries for models not seen this run; drop expired ones and
+    # the ones that now have an icon.
+    updated = {model: recorded for model, recorded in misses.items()
+               if model not in mapping and model in known_misses}
+    for model, rel_url in mapping.items():
+        if rel_url != DEFAULT_REL_URL:
+            continue
+        if model in known_misses:
+            updated[model] = misses[model]
+        elif model in hf_missing:
+            updated[model] = now
+    safe_write_json(icon_dir / MISSES_FILENAME, updated)
+    await asyncio.to_thread(prune_http_cache, icon_dir)
+    await asyncio.to_thread(prune_by_hash, icon_dir)
     return mapping
 
 
+def _make_session() -> aiohttp.ClientSession:
+    """Return an HTTP session backed by a pooled keep‑alive connector."""
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT, keepalive_timeout=KEEPALIVE_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def fetch_all(session: aiohttp.ClientSession,
+                    ollama_url: str = 'http://localhost:11434',
+                    openai_key: Optional[str] = None,
+                    ollama_turbo_url: Optional[str] = None,
+                    ollama_turbo_key: str = '',
+                    cache_file: Optional[Path] = None,
+                    ttl: float = DISCOVERY_TTL) -> Set[str]:
+    """
+    Query every configured back‑end concurrently and return the union of model IDs.
+    Discovery takes as long as the slowest endpoint rather than the sum of all of them.
+    OpenAI and Ollama‑Turbo are only queried when a key / URL is given.
+
+    With `cache_file`, each back‑end's model list is stored there under
+    `"<fetcher> <url>"`, followed by a short digest of the API key if there is one
+    (different accounts see different models), and reused without any request while
+    younger than `ttl` seconds. Empty results are not cached, so a failed query is
+    retried next run.
+    """
+    sources: List[Tuple[Callable[..., Awaitable[Set[str]]], str, str, Tuple[str, ...]]] = [
+        (_fetch_ollama_models, ollama_url, '', (ollama_url,)),
+    ]
+    if openai_key:
+        sources.append((_fetch_openai_models, OPENAI_MODELS_URL, openai_key, (openai_key,)))
+    if ollama_turbo_url:
+        sources.append((_fetch_ollama_turbo_models, ollama_turbo_url, ollama_turbo_key,
+                        (ollama_turbo_url, ollama_turbo_key)))
+
+    cache = load_state(cache_file) if cache_file else {}
+    now = time.time()
+    all_models: Set[str] = set()
+    stale = []
+    for fetcher, url, credential, fetch_args in sources:
+        key = f'{fetcher.__name__} {url}'
+        if credential:
+            key += f' {_credential_tag(credential)}'
+        entry = cache.get(key)
+        if isinstance(entry, dict) and now - entry.get('fetched_at', 0) < ttl:
+            all_models.update(entry['models'])
+        else:
+            stale.append((key, fetcher, fetch_args))
+
+    results = await asyncio.gather(
+        *(fetcher(session, *fetch_args) for _, fetcher, fetch_args in stale),
+        return_exceptions=True,
+    )
+
+    for (key, _, _), result in zip(stale, results):
+        if isinstance(result, BaseException):
+            print(f'⚠️  Model discovery failed: {result}', file=sys.stderr)
+            continue
+        all_models.update(result)
+        if result:
+            cache[key] = {'fetched_at': now, 'models': sorted(result)}
+
+    if cache_file and stale:
+        safe_write_json(cache_file, cache)
+    return all_models
+
+# -------------------------------------------------------------------------
+# Blocking wrappers
+# -------------------------------------------------------------------------
+# The coroutines above are the primary API: callers that already run an event
+# loop should await them and pass in their own session. These wrappers are for
+# plain synchronous callers and each run a private event loop and session.
+
+
+def _run_with_session(coro_fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+    """Run `coro_fn(session, *args, **kwargs)` to completion on a fresh session."""
+    async def runner() -> T:
+        async with _make_session() as session:
+            return await coro_fn(session, *args, **kwargs)
+    return asyncio.run(runner())
+
+
+def fetch_ollama_models(base_url: str = 'http://localhost:11434') -> Set[str]:
+    """Return a set of model IDs from a local Ollama daemon."""
+    return _run_with_session(_fetch_ollama_models, base_url)
+
+
+def fetch_openai_models(api_key: str) -> Set[str]:
+    """Return a set of model IDs from the official OpenAI endpoint."""
+    return _run_with_session(_fetch_openai_models, api_key)
+
+
+def fetch_ollama_turbo_models(url: str, api_key: str = '') -> Set[str]:
+    """Return a set of model IDs from an Ollama‑Turbo compatible endpoint."""
+    return _run_with_session(_fetch_ollama_turbo_models, url, api_key)
+
+
+def download_file(url: str, dest: Path) -> bool:
+    """Download a URL to `dest`. Returns True on success."""
+    return _run_with_session(download_file_async, url, dest)
+
+
+def download_hf_card_image(model_id: str, dest: Path) -> bool:
+    """Try to pull the model card image from Hugging‑Face to `dest`."""
+    return _run_with_session(download_hf_card_image_async, model_id, dest)
+
+
+def fallback_provider_badge(model_id: str, dest: Path) -> bool:
+    """If the model name contains a known provider token, use a small badge."""
+    return _run_with_session(fallback_provider_badge_async, model_id, dest)
+
+
+def build_icon_map(models: Set[str], icon_dir: Path,
+                   policy: HttpPolicy = DEFAULT_POLICY) -> Dict[str, str]:
+    """Blocking counterpart of `build_icon_map_async`."""
+    return _run_with_session(build_icon_map_async, models, icon_dir, policy)
+
+
+def _positive_int(value: str) -> int:
+    """argparse type: an integer of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid integer: {value!r}')
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {number}')
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    """argparse type: an integer of at least 0."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid integer: {value!r}')
+    if number < 0:
+        raise argparse.ArgumentTypeError(f'must be at least 0, got {number}')
+    return number
+
+
+def _non_negative_float(value: str) -> float:
+    """argparse type: a number of at least 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid number: {value!r}')
+    if not number >= 0:
+        raise argparse.ArgumentTypeError(f'must be at least 0, got {value}')
+    return number
+
+
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description='Generate OpenWebUI model‑icon mapping automatically.'
@@ -210,38 +938,72 @@ def parse_arguments() -> argparse.Namespace:
                         help='Directory where PNG icons will be stored')
     parser.add_argument('--static-json', default='./public/icons/model-icons.json',
                         help='Path of the generated JSON mapping')
+    parser.add_argument('--max-retries', type=_non_negative_int,
+                        default=DEFAULT_POLICY.max_retries,
+                        help='Retries for icon requests answered with 429 or 5xx')
+    parser.add_argument('--base-backoff', type=_non_negative_float,
+                        default=DEFAULT_POLICY.base_backoff,
+                        help='Initial retry delay in seconds, doubled on each attempt')
+    parser.add_argument('--concurrency', type=_positive_int, default=DEFAULT_POLICY.concurrency,
+                        help='Maximum number of models whose icons are resolved at once')
+    parser.add_argument('--per-host-concurrency', type=_positive_int,
+                        default=DEFAULT_POLICY.per_host_concurrency,
+                        help='Maximum number of simultaneous icon requests to one host')
+    parser.add_argument('--requests-per-second', type=_non_negative_float,
+                        default=DEFAULT_POLICY.requests_per_second,
+                        help='Overall cap on icon requests per second (0 = unlimited)')
+    parser.add_argument('--discovery-ttl', type=_non_negative_float, default=DISCOVERY_TTL,
+                        help='Seconds to reuse cached model lists before querying again')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached model lists and query every back-end')
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_arguments()
+async def _amain(args: argparse.Namespace) -> None:
+    # One session for the whole run, so discovery and icon downloads share connections.
+    async with _make_session() as session:
+        # Gather model IDs from every source the UI can talk to, preparing the
+        # (blocking) icon directory on a worker thread in the meantime.
+        icon_dir = Path(args.icon_dir).resolve()
+        _, all_models = await asyncio.gather(
+            asyncio.to_thread(ensure_default_icon, icon_dir),
+            fetch_all(
+                session,
+                ollama_url=args.ollama_url,
+                openai_key=args.openai_key or os.getenv('OPENAI_API_KEY'),
+                ollama_turbo_url=args.ollama_turbo_url,
+                ollama_turbo_key=os.getenv('OLLAMA_TURBO_API_KEY', ''),
+                cache_file=icon_dir / MODEL_LISTS_FILENAME,
+                ttl=0 if args.refresh else args.discovery_ttl,
+            ),
+        )
+
+        if not all_models:
+            print('⚠️  No models discovered – exiting.', file=sys.stderr)
+            sys.exit(1)
+
+        policy = HttpPolicy(
+            max_retries=args.max_retries,
+            base_backoff=args.base_backoff,
+            concurrency=args.concurrency,
+            per_host_concurrency=args.per_host_concurrency,
+            requests_per_second=args.requests_per_second,
+        )
+        mapping = await build_icon_map_async(session, all_models, icon_dir, policy)
 
-    # Gather model IDs from every source the UI can talk to
-    all_models: Set[str] = set()
-    all_models.update(fetch_ollama_models(args.ollama_url))
-
-    if args.openai_key or os.getenv('OPENAI_API_KEY'):
-        api_key = args.openai_key or os.getenv('OPENAI_API_KEY')
-        all_models.update(fetch_openai_models(api_key))
-
-    if args.ollama_turbo_url:
-        api_key = os.getenv('OLLAMA_TURBO_API_KEY', '')
-        all_models.update(fetch_ollama_turbo_models(args.ollama_turbo_url, api_key))
-
-    if not all_models:
-        print('⚠️  No models discovered – exiting.', file=sys.stderr)
-        sys.exit(1)
-
-    icon_dir = Path(args.icon_dir).resolve()
-    ensure_default_icon(icon_dir)
-
-    mapping = build_icon_map(all_models, icon_dir)
     json_path = Path(args.static_json).resolve()
-    safe_write_json(json_path, mapping)
+    if not safe_write_json(json_path, mapping):
+        print(f'✅  Mapping for {len(mapping)} models is unchanged → {json_path}')
+        return
 
     print(f'✅  Generated mapping for {len(mapping)} models → {json_path}')
     print('🔄  Restart OpenWebUI (docker compose restart open-webui) to see the changes.')
 
 
+def main() -> None:
+    args = parse_arguments()
+    asyncio.run(_amain(args))
+
+
 if __name__ == '__main__':
     main()
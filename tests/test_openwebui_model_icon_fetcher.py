@@ -0,0 +1,675 @@
+"""Unit tests for OpenWebUI_Model_Icon_Fetcher.py."""
+
+import asyncio
+import io
+import os
+import stat
+import sys
+import tempfile
+import time
+import unittest
+from collections import Counter
+from contextlib import redirect_stderr
+from email.utils import formatdate
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import aiohttp
+import orjson
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import OpenWebUI_Model_Icon_Fetcher as fetcher  # noqa: E402
+
+
+class FakeResponse:
+    """Just enough of `aiohttp.ClientResponse` for `_request` and its callers."""
+
+    def __init__(self, status: int = 200, body: bytes = b'', headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise RuntimeError(f'HTTP {self.status}')
+
+    async def read(self) -> bytes:
+        return self.body
+
+    @property
+    def content(self):
+        # The body stream; this object provides `iter_chunked` itself.
+        return self
+
+    async def iter_chunked(self, size: int):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+    def release(self) -> None:
+        pass
+
+
+class FakeSession:
+    """
+    Answer requests with canned responses and record every request made.
+    `responses` is either a list, consumed in order, or a dict keyed by
+    `(method, url)`. An exception in place of a response is raised instead.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses if isinstance(responses, dict) else list(responses)
+        self.calls = []
+
+    async def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        if isinstance(self.responses, dict):
+            response = self.responses[(method, url)]
+        else:
+            response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+def png_bytes(size) -> bytes:
+    """Return a solid‑colour PNG of the given size."""
+    buffer = io.BytesIO()
+    Image.new('RGBA', size, (10, 200, 30, 255)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class TestOpenWebUIModelIconFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.tmp_dir = Path(self.tmp.name)
+
+    # -- Retry ---------------------------------------------------------------
+
+    def test_retry_delay_honours_retry_after_seconds(self):
+        resp = SimpleNamespace(headers={'Retry-After': '3'})
+        self.assertEqual(fetcher._retry_delay(resp, 0, 0.5), 3.0)
+
+    def test_retry_delay_honours_retry_after_http_date(self):
+        resp = SimpleNamespace(headers={'Retry-After': formatdate(time.time() + 10, usegmt=True)})
+        self.assertTrue(8.0 <= fetcher._retry_delay(resp, 0, 0.5) <= 10.0)
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual(
+            fetcher._retry_delay(SimpleNamespace(headers={'Retry-After': '3600'}), 0, 0.5),
+            fetcher.MAX_BACKOFF,
+        )
+        self.assertEqual(
+            fetcher._retry_delay(SimpleNamespace(headers={}), 20, 0.5), fetcher.MAX_BACKOFF
+        )
+
+    def test_retry_delay_past_date_or_garbage(self):
+        past = SimpleNamespace(headers={'Retry-After': formatdate(time.time() - 60, usegmt=True)})
+        self.assertEqual(fetcher._retry_delay(past, 0, 0.5), 0.0)
+        # An unparsable header falls back to exponential backoff with jitter.
+        garbage = SimpleNamespace(headers={'Retry-After': 'soon'})
+        self.assertTrue(1.0 <= fetcher._retry_delay(garbage, 1, 0.5) <= 1.3)
+
+    def test_request_retries_transient_statuses(self):
+        session = FakeSession([
+            FakeResponse(503, headers={'Retry-After': '0'}),
+            FakeResponse(429, headers={'Retry-After': '0'}),
+            FakeResponse(200, b'ok'),
+        ])
+
+        async def run():
+            async with fetcher._request(session, 'GET', 'https://example.com/x') as resp:
+                return resp.status
+
+        self.assertEqual(asyncio.run(run()), 200)
+        self.assertEqual(len(session.calls), 3)
+
+    def test_request_gives_up_after_max_retries(self):
+        session = FakeSession([FakeResponse(503, headers={'Retry-After': '0'})] * 3)
+        policy = fetcher.HttpPolicy(max_retries=2)
+
+        async def run():
+            async with fetcher._request(session, 'GET', 'https://example.com/x', policy) as resp:
+                return resp.status
+
+        self.assertEqual(asyncio.run(run()), 503)
+        self.assertEqual(len(session.calls), 3)
+
+    # -- Request limits ------------------------------------------------------
+
+    def test_throttle_spaces_calls(self):
+        async def run():
+            throttle = fetcher._make_throttle(50)
+            start = asyncio.get_running_loop().time()
+            for _ in range(3):
+                await throttle()
+            return asyncio.get_running_loop().time() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.035)
+
+    def test_request_limits_concurrent_requests_per_host(self):
+        hosts = ['huggingface.co', 'example.com']
+        urls = [f'https://{host}/{i}' for host in hosts for i in range(6)]
+        session = FakeSession({('GET', url): FakeResponse(200) for url in urls})
+        policy = fetcher._bind_limits(fetcher.HttpPolicy(per_host_concurrency=2))
+        active = Counter()
+        peak = Counter()
+
+        async def fetch(url):
+            host = url.split('/')[2]
+            async with fetcher._request(session, 'GET', url, policy):
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+                await asyncio.sleep(0.01)
+                active[host] -= 1
+
+        async def run():
+            await asyncio.gather(*(fetch(url) for url in urls))
+
+        asyncio.run(run())
+        self.assertEqual(peak, {host: 2 for host in hosts})
+        self.assertEqual(len(session.calls), len(urls))
+
+    # -- Mapping file --------------------------------------------------------
+
+    def test_safe_write_json_skips_unchanged_content(self):
+        path = self.tmp_dir / 'out' / 'model-icons.json'
+        self.assertTrue(fetcher.safe_write_json(path, {'b': '/icons/b.png', 'a': '/icons/a.png'}))
+        self.assertEqual(path.read_bytes(),
+                         b'{\n  "a": "/icons/a.png",\n  "b": "/icons/b.png"\n}\n')
+        before = path.stat().st_mtime_ns
+        self.assertFalse(fetcher.safe_write_json(path, {'a': '/icons/a.png', 'b': '/icons/b.png'}))
+        self.assertEqual(path.stat().st_mtime_ns, before)
+        self.assertTrue(fetcher.safe_write_json(path, {'a': '/icons/default.png'}))
+        self.assertEqual(list(path.parent.glob('.*.tmp')), [])
+
+    # -- Download cache ------------------------------------------------------
+
+    def test_download_shares_one_transfer_per_url(self):
+        url = 'https://example.com/badge.png'
+        # A list session fails any request beyond the first one.
+        session = FakeSession([FakeResponse(200, png_bytes((4, 4)))])
+
+        async def run():
+            return await asyncio.gather(*(
+                fetcher.download_file_async(session, url, self.tmp_dir / f'gpt-{i}.png')
+                for i in range(5)
+            ))
+
+        self.assertEqual(asyncio.run(run()), [True] * 5)
+        self.assertEqual(len(session.calls), 1)
+        self.assertEqual(fetcher._IN_FLIGHT, {})
+
+    def test_download_reuses_fresh_cache_entries(self):
+        url = 'https://example.com/badge.png'
+        session = FakeSession([FakeResponse(200, png_bytes((4, 4))),
+                               FakeResponse(200, png_bytes((5, 5)))])
+        self.assertTrue(asyncio.run(
+            fetcher.download_file_async(session, url, self.tmp_dir / 'first.png')))
+        self.assertTrue(asyncio.run(
+            fetcher.download_file_async(session, url, self.tmp_dir / 'second.png')))
+        self.assertEqual(len(session.calls), 1)
+
+        cached = fetcher._cache_path(url, self.tmp_dir)
+        old = time.time() - fetcher.HTTP_CACHE_TTL - 60
+        os.utime(cached, (old, old))
+        self.assertTrue(asyncio.run(
+            fetcher.download_file_async(session, url, self.tmp_dir / 'third.png')))
+        self.assertEqual(len(session.calls), 2)
+
+    def test_prune_http_cache_removes_only_expired_entries(self):
+        cache_dir = self.tmp_dir / fetcher.HTTP_CACHE_DIRNAME
+        cache_dir.mkdir()
+        fresh = cache_dir / 'fresh.png'
+        stale = cache_dir / 'stale.png'
+        fresh.write_bytes(b'x')
+        stale.write_bytes(b'x')
+        old = time.time() - fetcher.HTTP_CACHE_TTL - 60
+        os.utime(stale, (old, old))
+        fetcher.prune_http_cache(self.tmp_dir)
+        self.assertTrue(fresh.exists())
+        self.assertFalse(stale.exists())
+
+    # -- Icon validation -----------------------------------------------------
+
+    def test_normalise_icon_rejects_non_images(self):
+        self.assertIsNone(fetcher.normalise_icon(b'<html><body>Not Found</body></html>'))
+        self.assertIsNone(fetcher.normalise_icon(b''))
+
+    def test_normalise_icon_shrinks_large_images(self):
+        payload = fetcher.normalise_icon(png_bytes((600, 400)))
+        self.assertIsNotNone(payload)
+        with Image.open(io.BytesIO(payload)) as im:
+            self.assertEqual(im.format, 'PNG')
+            self.assertEqual(im.size, (128, 85))
+
+    def test_download_stores_normalised_icons(self):
+        url = 'https://example.com/card.png'
+        session = FakeSession([FakeResponse(200, png_bytes((600, 400)))])
+        dest = self.tmp_dir / 'model.png'
+        self.assertTrue(asyncio.run(fetcher.download_file_async(session, url, dest)))
+        with Image.open(dest) as im:
+            self.assertEqual(im.size, (128, 85))
+        self.assertEqual(fetcher._cache_path(url, self.tmp_dir).read_bytes(), dest.read_bytes())
+
+    def test_download_rejects_non_images(self):
+        url = 'https://example.com/card.png'
+        session = FakeSession([FakeResponse(200, b'<html><body>Not Found</body></html>')])
+        dest = self.tmp_dir / 'model.png'
+        with redirect_stderr(io.StringIO()) as err:
+            outcome = asyncio.run(fetcher._download(session, url, dest))
+        self.assertIs(outcome, fetcher.Outcome.MISSING)
+        self.assertIn('did not return a usable image', err.getvalue())
+        self.assertFalse(dest.exists())
+        self.assertEqual(list((self.tmp_dir / fetcher.HTTP_CACHE_DIRNAME).iterdir()), [])
+
+    def test_download_removes_partial_file_on_error(self):
+        class BrokenResponse(FakeResponse):
+            async def iter_chunked(self, size):
+                yield self.body[:16]
+                raise aiohttp.ClientPayloadError('connection reset')
+
+        url = 'https://example.com/card.png'
+        session = FakeSession([BrokenResponse(200, png_bytes((600, 400)))])
+        dest = self.tmp_dir / 'model.png'
+        with redirect_stderr(io.StringIO()):
+            outcome = asyncio.run(fetcher._download(session, url, dest))
+        self.assertIs(outcome, fetcher.Outcome.FAILED)
+        self.assertFalse(dest.exists())
+        self.assertEqual(list((self.tmp_dir / fetcher.HTTP_CACHE_DIRNAME).iterdir()), [])
+
+    # -- Shared icon store ---------------------------------------------------
+
+    def test_link_by_hash_shares_one_store_file(self):
+        src = self.tmp_dir / 'src.png'
+        src.write_bytes(png_bytes((4, 4)))
+        first = self.tmp_dir / 'gpt-4o.png'
+        second = self.tmp_dir / 'gpt-4o-mini.png'
+        self.assertTrue(fetcher._link_by_hash(src, first))
+        self.assertTrue(fetcher._link_by_hash(src, second))
+        # Linking again onto an existing destination must not fail.
+        self.assertTrue(fetcher._link_by_hash(src, first))
+        store = list((self.tmp_dir / fetcher.BY_HASH_DIRNAME).iterdir())
+        self.assertEqual(len(store), 1)
+        self.assertTrue(os.path.samefile(first, store[0]))
+        self.assertTrue(os.path.samefile(second, store[0]))
+        self.assertEqual(stat.S_IMODE(store[0].stat().st_mode), 0o444)
+        self.assertEqual(sorted(p.name for p in self.tmp_dir.glob('.*.tmp')), [])
+
+    def test_link_by_hash_replaces_a_modified_store_file(self):
+        src = self.tmp_dir / 'src.png'
+        src.write_bytes(png_bytes((4, 4)))
+        first = self.tmp_dir / 'gpt-4o.png'
+        self.assertTrue(fetcher._link_by_hash(src, first))
+        # Overwrite the icon in place, as `cp custom.png gpt-4o.png` would.
+        os.chmod(first, 0o644)
+        first.write_bytes(png_bytes((9, 9)))
+
+        later = self.tmp_dir / 'gpt-4.1.png'
+        self.assertTrue(fetcher._link_by_hash(src, later))
+        self.assertEqual(later.read_bytes(), src.read_bytes())
+        (store,) = (self.tmp_dir / fetcher.BY_HASH_DIRNAME).iterdir()
+        self.assertEqual(fetcher.hashlib.sha256(store.read_bytes()).hexdigest(), store.stem)
+
+    def test_prune_by_hash_removes_unlinked_store_files(self):
+        src = self.tmp_dir / 'src.png'
+        store_names = {}
+        for size, name in [((4, 4), 'kept.png'), ((5, 5), 'removed.png'),
+                           ((6, 6), 'symlinked.png')]:
+            src.write_bytes(png_bytes(size))
+            fetcher._link_by_hash(src, self.tmp_dir / name)
+            store_names[name] = f'{fetcher.hashlib.sha256(src.read_bytes()).hexdigest()}.png'
+        (self.tmp_dir / 'removed.png').unlink()
+        # Turn one icon into a symlink, as on filesystems without hard links.
+        symlinked = self.tmp_dir / 'symlinked.png'
+        symlinked.unlink()
+        symlinked.symlink_to(Path(fetcher.BY_HASH_DIRNAME) / store_names['symlinked.png'])
+
+        fetcher.prune_by_hash(self.tmp_dir)
+        remaining = {p.name for p in (self.tmp_dir / fetcher.BY_HASH_DIRNAME).iterdir()}
+        self.assertEqual(remaining, {store_names['kept.png'], store_names['symlinked.png']})
+
+    # -- Provider badges -----------------------------------------------------
+
+    def _badge_url(self, model_id):
+        """Return the badge URL `fallback_provider_badge_async` picks for `model_id`."""
+        urls = []
+
+        async def fake_download_file_async(session, url, dest, policy=fetcher.DEFAULT_POLICY):
+            urls.append(url)
+            return True
+
+        with mock.patch.object(fetcher, 'download_file_async', fake_download_file_async):
+            found = asyncio.run(fetcher.fallback_provider_badge_async(
+                None, model_id, self.tmp_dir / 'icon.png'))
+        return urls[0] if found else None
+
+    def test_fallback_provider_badge_follows_the_current_table(self):
+        self.assertEqual(self._badge_url('GPT-4o'), fetcher.PROVIDER_ASSETS['gpt-'])
+        self.assertIsNone(self._badge_url('mistral-large'))
+        with mock.patch.dict(fetcher.PROVIDER_ASSETS, {'mistral-': 'https://example.com/m.png'}):
+            self.assertEqual(self._badge_url('mistral-large'), 'https://example.com/m.png')
+        with mock.patch.dict(fetcher.PROVIDER_ASSETS):
+            del fetcher.PROVIDER_ASSETS['gpt-']
+            self.assertIsNone(self._badge_url('gpt-4o'))
+
+    def test_fallback_provider_badge_with_empty_table(self):
+        with mock.patch.dict(fetcher.PROVIDER_ASSETS, clear=True):
+            self.assertIsNone(self._badge_url('gpt-4o'))
+
+    # -- Hugging‑Face listing --------------------------------------------------
+
+    def test_list_hf_repos(self):
+        body = orjson.dumps([{'id': 'Org/Model-A'}, {'id': 'org/model-b'}])
+        session = FakeSession([FakeResponse(200, body)])
+        repos = asyncio.run(fetcher.list_hf_repos(session, 'org'))
+        self.assertEqual(repos, {'org/model-a', 'org/model-b'})
+        self.assertEqual(session.calls[0][2]['params']['author'], 'org')
+
+    def test_list_hf_repos_truncated_or_failed_is_unknown(self):
+        body = orjson.dumps([{'id': f'org/m{i}'} for i in range(fetcher.HF_LIST_LIMIT)])
+        session = FakeSession([FakeResponse(200, body)])
+        self.assertIsNone(asyncio.run(fetcher.list_hf_repos(session, 'org')))
+
+        session = FakeSession([FakeResponse(404)])
+        with redirect_stderr(io.StringIO()):
+            self.assertIsNone(asyncio.run(fetcher.list_hf_repos(session, 'org')))
+
+    def test_list_hf_repos_malformed_is_unknown(self):
+        for body in [b'{"error": "Invalid username or password."}',
+                     b'[{"modelId": "org/model"}]',
+                     b'[null]',
+                     b'not json']:
+            with self.subTest(body=body):
+                session = FakeSession([FakeResponse(200, body)])
+                with redirect_stderr(io.StringIO()):
+                    self.assertIsNone(asyncio.run(fetcher.list_hf_repos(session, 'org')))
+
+    def test_filter_hf_candidates(self):
+        listings = {'known': {'known/listed'}, 'unknown': None}
+        listed_authors = []
+
+        async def fake_list_hf_repos(session, author, policy=fetcher.DEFAULT_POLICY):
+            listed_authors.append(author)
+            return listings[author]
+
+        models = ['known/listed', 'Known/Listed', 'known/missing', 'unknown/one',
+                  'unknown/two', 'solo/model', 'plain-model']
+        with mock.patch.object(fetcher, 'list_hf_repos', fake_list_hf_repos):
+            candidates = asyncio.run(fetcher.filter_hf_candidates(None, models))
+
+        # Listed repos are kept case-insensitively; unknown listings keep everything;
+        # single-model authors are not listed at all and go straight to the probe.
+        self.assertEqual(candidates, ['known/listed', 'Known/Listed', 'unknown/one', 'unknown/two',
+                                      'solo/model'])
+        self.assertEqual(sorted(listed_authors), ['known', 'unknown'])
+
+    # -- Model discovery -----------------------------------------------------
+
+    def _fetch_all_with(self, results, **kwargs):
+        """
+        Run `fetch_all` with fake fetchers for all three back‑ends. Each fake waits
+        until every back‑end has been queried, so only a concurrent `fetch_all` gets
+        all results; an entry of `results` that is an exception is raised instead.
+        """
+        async def run():
+            started = []
+            all_started = asyncio.Event()
+
+            def fake(name):
+                async def fetch(session, *args):
+                    started.append(name)
+                    if len(started) == len(results):
+                        all_started.set()
+                    await asyncio.wait_for(all_started.wait(), timeout=1)
+                    if isinstance(results[name], Exception):
+                        raise results[name]
+                    return results[name]
+                fetch.__name__ = name
+                return fetch
+
+            with mock.patch.multiple(fetcher, **{name: fake(name) for name in results}):
+                return await fetcher.fetch_all(None, openai_key='sk-test',
+                                               ollama_turbo_url='https://turbo/v1/models',
+                                               **kwargs)
+
+        with redirect_stderr(io.StringIO()):
+            return asyncio.run(run())
+
+    def test_fetch_all_queries_back_ends_concurrently(self):
+        results = {'_fetch_ollama_models': {'llama3'},
+                   '_fetch_openai_models': {'gpt-4o'},
+                   '_fetch_ollama_turbo_models': {'gpt-oss:120b'}}
+        self.assertEqual(self._fetch_all_with(results), {'llama3', 'gpt-4o', 'gpt-oss:120b'})
+
+    def test_fetch_all_survives_a_failing_back_end(self):
+        results = {'_fetch_ollama_models': {'llama3'},
+                   '_fetch_openai_models': RuntimeError('boom'),
+                   '_fetch_ollama_turbo_models': {'gpt-oss:120b'}}
+        self.assertEqual(self._fetch_all_with(results), {'llama3', 'gpt-oss:120b'})
+
+    # -- Model-list cache ----------------------------------------------------
+
+    def _fetch_all_counting(self, results, **kwargs):
+        """Run `fetch_all` with a fake Ollama fetcher; return (models, call count)."""
+        calls = []
+
+        async def _fetch_ollama_models(session, base_url):
+            calls.append(base_url)
+            return results
+
+        with mock.patch.object(fetcher, '_fetch_ollama_models', _fetch_ollama_models):
+            models = asyncio.run(fetcher.fetch_all(None, ollama_url='http://ollama', **kwargs))
+        return models, len(calls)
+
+    def test_fetch_all_reuses_cached_model_lists(self):
+        cache_file = self.tmp_dir / fetcher.MODEL_LISTS_FILENAME
+        self.assertEqual(self._fetch_all_counting({'a', 'b'}, cache_file=cache_file),
+                         ({'a', 'b'}, 1))
+        self.assertEqual(self._fetch_all_counting({'c'}, cache_file=cache_file),
+                         ({'a', 'b'}, 0))
+
+    def test_fetch_all_refetches_expired_model_lists(self):
+        cache_file = self.tmp_dir / fetcher.MODEL_LISTS_FILENAME
+        self._fetch_all_counting({'a'}, cache_file=cache_file)
+
+        # ttl=0 is what --refresh passes.
+        self.assertEqual(self._fetch_all_counting({'b'}, cache_file=cache_file, ttl=0),
+                         ({'b'}, 1))
+
+        cache = orjson.loads(cache_file.read_bytes())
+        for entry in cache.values():
+            entry['fetched_at'] -= fetcher.DISCOVERY_TTL + 1
+        cache_file.write_bytes(orjson.dumps(cache))
+        self.assertEqual(self._fetch_all_counting({'c'}, cache_file=cache_file), ({'c'}, 1))
+
+    def test_fetch_all_does_not_cache_empty_results(self):
+        cache_file = self.tmp_dir / fetcher.MODEL_LISTS_FILENAME
+        self.assertEqual(self._fetch_all_counting(set(), cache_file=cache_file), (set(), 1))
+        self.assertEqual(self._fetch_all_counting({'a'}, cache_file=cache_file), ({'a'}, 1))
+
+    def test_fetch_all_keys_cached_lists_by_credential(self):
+        cache_file = self.tmp_dir / fetcher.MODEL_LISTS_FILENAME
+        calls = []
+
+        accounts = {'sk-first': {'gpt-4o'}, 'sk-second': {'gpt-4o', 'ft:gpt-4o:acme'}}
+
+        async def _fetch_openai_models(session, api_key):
+            calls.append(api_key)
+            return accounts[api_key]
+
+        with mock.patch.object(fetcher, '_fetch_openai_models', _fetch_openai_models):
+            for key in ['sk-first', 'sk-second', 'sk-first']:
+                models, _ = self._fetch_all_counting({'llama3'}, cache_file=cache_file,
+                                                     openai_key=key)
+                self.assertEqual(models, {'llama3'} | accounts[key])
+        self.assertEqual(calls, ['sk-first', 'sk-second'])
+        # Only a digest of each key is stored, never the key itself.
+        self.assertNotIn(b'sk-', cache_file.read_bytes())
+
+    def test_load_state_ignores_unexpected_shapes(self):
+        path = self.tmp_dir / fetcher.MISSES_FILENAME
+        for payload in [b'[]', b'"text"', b'42', b'{not json']:
+            with self.subTest(payload=payload):
+                path.write_bytes(payload)
+                with redirect_stderr(io.StringIO()):
+                    self.assertEqual(fetcher.load_state(path), {})
+        path.write_bytes(b'{"ok/model": 1700000000.5, "bad/model": "yesterday"}')
+        self.assertEqual(fetcher.load_misses(self.tmp_dir), {'ok/model': 1700000000.5})
+
+    # -- Card image probes ---------------------------------------------------
+
+    def test_probe_hf_outcomes(self):
+        url = fetcher.hf_card_url('org/model')
+        policy = fetcher.HttpPolicy(max_retries=0)
+        Outcome = fetcher.Outcome
+        for status, expected in [(200, Outcome.FOUND), (404, Outcome.MISSING),
+                                 (410, Outcome.MISSING), (401, Outcome.FAILED),
+                                 (503, Outcome.FAILED)]:
+            with self.subTest(status=status):
+                session = FakeSession([FakeResponse(status)])
+                outcome = asyncio.run(fetcher.probe_hf(session, 'org/model', self.tmp_dir, policy))
+                self.assertIs(outcome, expected)
+                self.assertEqual(session.calls[0][:2], ('HEAD', url))
+
+        session = FakeSession([aiohttp.ClientConnectionError('DNS failure')])
+        with redirect_stderr(io.StringIO()):
+            outcome = asyncio.run(fetcher.probe_hf(session, 'org/model', self.tmp_dir))
+        self.assertIs(outcome, Outcome.FAILED)
+
+    def test_probe_hf_without_network(self):
+        session = FakeSession([])
+        self.assertIs(asyncio.run(fetcher.probe_hf(session, 'plain-model', self.tmp_dir)),
+                      fetcher.Outcome.MISSING)
+
+        cached = fetcher._cache_path(fetcher.hf_card_url('org/model'), self.tmp_dir)
+        cached.parent.mkdir()
+        cached.write_bytes(png_bytes((4, 4)))
+        self.assertIs(asyncio.run(fetcher.probe_hf(session, 'org/model', self.tmp_dir)),
+                      fetcher.Outcome.FOUND)
+        self.assertEqual(session.calls, [])
+
+    # -- Known misses --------------------------------------------------------
+
+    def test_build_icon_map_records_only_definitive_misses(self):
+        card = fetcher.hf_card_url
+        now = time.time()
+        (self.tmp_dir / fetcher.MISSES_FILENAME).write_bytes(orjson.dumps({
+            'known/miss': now - 60,
+            'unseen/recent': now - 60,
+            'unseen/expired': now - fetcher.MISS_TTL - 60,
+            'now/has-icon': now - 60,
+        }))
+        (self.tmp_dir / 'now-has-icon.png').write_bytes(png_bytes((4, 4)))
+        session = FakeSession({
+            ('HEAD', card('found/model')): FakeResponse(200),
+            ('GET', card('found/model')): FakeResponse(200, png_bytes((4, 4))),
+            ('HEAD', card('gone/model')): FakeResponse(404),
+            ('HEAD', card('limited/model')): FakeResponse(429),
+            ('HEAD', card('offline/model:tag')): aiohttp.ClientConnectionError('DNS failure'),
+            ('HEAD', card('broken/card')): FakeResponse(200),
+            ('GET', card('broken/card')): aiohttp.ClientConnectionError('reset'),
+        })
+        models = {'found/model', 'gone/model', 'limited/model', 'offline/model:tag',
+                  'broken/card', 'plain-model', 'known/miss', 'now/has-icon'}
+        policy = fetcher.HttpPolicy(max_retries=0)
+
+        with mock.patch.dict(fetcher.PROVIDER_ASSETS, clear=True), \
+                redirect_stderr(io.StringIO()):
+            mapping = asyncio.run(
+                fetcher.build_icon_map_async(session, models, self.tmp_dir, policy)
+            )
+
+        self.assertEqual(mapping.pop('found/model'), '/icons/found-model.png')
+        self.assertEqual(mapping.pop('now/has-icon'), '/icons/now-has-icon.png')
+        self.assertEqual(set(mapping.values()), {fetcher.DEFAULT_REL_URL})
+        # Known misses are not probed again.
+        self.assertNotIn(('HEAD', card('known/miss')), [call[:2] for call in session.calls])
+
+        # Rate limiting, network errors and a failed card download are not misses.
+        misses = orjson.loads((self.tmp_dir / fetcher.MISSES_FILENAME).read_bytes())
+        self.assertEqual(sorted(misses),
+                         ['gone/model', 'known/miss', 'plain-model', 'unseen/recent'])
+        self.assertEqual(misses['known/miss'], now - 60)
+        self.assertGreaterEqual(misses['gone/model'], now)
+
+    # -- Blocking wrappers ---------------------------------------------------
+
+    def test_blocking_wrappers_keep_their_signatures(self):
+        card = fetcher.hf_card_url('org/model')
+        badge = fetcher.PROVIDER_ASSETS['gpt-']
+        session = FakeSession({
+            ('GET', card): FakeResponse(200, png_bytes((4, 4))),
+            ('GET', badge): FakeResponse(200, png_bytes((8, 8))),
+        })
+        with mock.patch.object(fetcher, '_make_session', lambda: session):
+            self.assertTrue(fetcher.download_hf_card_image('org/model',
+                                                           self.tmp_dir / 'org-model.png'))
+            self.assertFalse(fetcher.download_hf_card_image('plain-model',
+                                                            self.tmp_dir / 'plain-model.png'))
+            self.assertTrue(fetcher.fallback_provider_badge('gpt-4o', self.tmp_dir / 'gpt-4o.png'))
+            self.assertTrue(fetcher.download_file(card, self.tmp_dir / 'copy.png'))
+
+        for name in ['org-model.png', 'gpt-4o.png', 'copy.png']:
+            self.assertTrue((self.tmp_dir / name).is_file(), name)
+        self.assertFalse((self.tmp_dir / 'plain-model.png').exists())
+        # The second download of the card image is served from the cache.
+        self.assertEqual(len(session.calls), 2)
+
+    # -- Command-line arguments ------------------------------------------------
+
+    def _parse(self, *argv):
+        with mock.patch.object(sys, 'argv', ['OpenWebUI_Model_Icon_Fetcher.py', *argv]):
+            return fetcher.parse_arguments()
+
+    def test_parse_arguments_defaults(self):
+        args = self._parse()
+        self.assertEqual(args.concurrency, fetcher.MAX_CONCURRENCY)
+        self.assertEqual(args.per_host_concurrency, fetcher.PER_HOST_CONCURRENCY)
+        self.assertEqual(args.requests_per_second, 0.0)
+        self.assertFalse(args.refresh)
+
+    def test_parse_arguments_accepts_valid_limits(self):
+        args = self._parse('--concurrency', '1', '--per-host-concurrency', '2',
+                           '--requests-per-second', '0.5')
+        self.assertEqual((args.concurrency, args.per_host_concurrency, args.requests_per_second),
+                         (1, 2, 0.5))
+
+    def test_parse_arguments_rejects_invalid_limits(self):
+        invalid = [
+            ('--concurrency', '0'),
+            ('--concurrency', '-3'),
+            ('--concurrency', 'many'),
+            ('--per-host-concurrency', '0'),
+            ('--requests-per-second', '-1'),
+            ('--requests-per-second', 'nan'),
+        ]
+        for argv in invalid:
+            with self.subTest(argv=argv):
+                with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as ctx:
+                    self._parse(*argv)
+                self.assertEqual(ctx.exception.code, 2)
+
+    def test_parse_arguments_retry_settings(self):
+        args = self._parse('--max-retries', '0', '--base-backoff', '0')
+        self.assertEqual((args.max_retries, args.base_backoff), (0, 0.0))
+        for argv in [('--max-retries', '-1'), ('--max-retries', '1.5'),
+                     ('--base-backoff', '-0.5'), ('--discovery-ttl', '-1')]:
+            with self.subTest(argv=argv):
+                with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as ctx:
+                    self._parse(*argv)
+                self.assertEqual(ctx.exception.code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()